@@ -1,17 +1,27 @@
+import asyncio
 import logging
-import httpx
-from alphaess.alphaess import alphaess
-from datetime import time
+import random
 
 from config import Config
 
+RETRY_ATTEMPTS = 3
+MIN_BACKOFF_SECS = 1.0
+MAX_BACKOFF_SECS = 30.0
+
 class AlphaESSManager:
     def __init__(self, config: Config):
-        self.client = alphaess(config['app_id'], config['app_secret'])
-        self.serial_number = config['serial_number']
+        # Imported here so importing this module doesn't pull in the client library and its HTTP stack
+        from alphaess.alphaess import alphaess
+
+        self.client = alphaess(config.app_id, config.app_secret)
+        self.serial_number = config.serial_number
 
     async def set_charging_schedule(self, should_charge: bool, start_time1: str, end_time1: str, start_time2: str, end_time2: str) -> bool:
-        for attempt in range(3):
+        # The alphaess client is built on aiohttp and raises its errors for bad responses
+        from aiohttp import ClientResponseError
+
+        delay = MIN_BACKOFF_SECS
+        for attempt in range(RETRY_ATTEMPTS):
             try:
                 await self.client.updateChargeConfigInfo(
                     sysSn=self.serial_number, 
@@ -25,16 +35,23 @@ class AlphaESSManager:
                 logging.info("Successfully sent charging schedule to ESS")
                 await self.client.close()
                 return True
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 401:
+            except ClientResponseError as e:
+                if e.status in (401, 403):
+                    # Retrying won't fix bad credentials
                     logging.error("Authentication failed. Please check your credentials")
-                else:
-                    logging.error(f"HTTP error occurred: {e}")
+                    break
+                logging.error("HTTP error occurred: %s", e)
             except Exception as e:
-                logging.error(f"An error occurred: {e}")
-            logging.warning(f"Attempt {attempt + 1} failed, retrying...")
+                logging.error("An error occurred: %s", e)
+
+            if attempt + 1 < RETRY_ATTEMPTS:
+                # Exponential backoff with jitter, asyncio.sleep keeps the event loop free while waiting
+                wait = min(delay + random.uniform(0, delay * 0.1), MAX_BACKOFF_SECS)
+                logging.warning("Attempt %d failed, retrying in %.1fs...", attempt + 1, wait)
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, MAX_BACKOFF_SECS)
         
-        logging.error("Failed to set charging schedule after 3 attempts")
+        logging.error("Failed to set charging schedule after %d attempt(s)", attempt + 1)
         await self.client.close()
         return False
 
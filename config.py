@@ -1,5 +1,40 @@
+import copy
+import os
+from collections import OrderedDict
+from functools import cached_property
+from typing import Dict, Tuple
+
 import yaml
-from typing import Dict
+
+try:
+    # libyaml-backed loader, several times faster than the pure-Python one
+    from yaml import CSafeLoader as _Loader
+except ImportError:
+    from yaml import SafeLoader as _Loader
+
+_YAML_CACHE_MAX_SIZE = 100
+# Parsed YAML files keyed by absolute path, valid while the file's (mtime_ns, size) is unchanged
+_YAML_CACHE: "OrderedDict[str, Tuple[int, int, Dict]]" = OrderedDict()
+
+
+def load_yaml(path: str) -> Dict:
+    """Load a YAML file, reusing the parsed content while the file is unchanged on disk"""
+    key = os.path.abspath(path)
+    st = os.stat(key)
+    cached = _YAML_CACHE.get(key)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        _YAML_CACHE.move_to_end(key)
+        return copy.deepcopy(cached[2])
+
+    with open(key) as f:
+        data = yaml.load(f, Loader=_Loader)
+    _YAML_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+    _YAML_CACHE.move_to_end(key)
+    if len(_YAML_CACHE) > _YAML_CACHE_MAX_SIZE:
+        _YAML_CACHE.popitem(last=False)
+    # Hand out a copy so callers can't mutate the cached content
+    return copy.deepcopy(data)
+
 
 class Config:
     def __init__(self, config_path: str):
@@ -8,8 +43,7 @@ class Config:
         self.validate_config()
 
     def load_config(self) -> Dict:
-        with open(self.config_path) as f:
-            return yaml.safe_load(f)
+        return load_yaml(self.config_path)
 
     def validate_config(self) -> None:
         required_keys = ["app_id", "app_secret", "serial_number", "price_multiplier", "charge_to_full"]
@@ -19,3 +53,27 @@ class Config:
 
     def __getitem__(self, key):
         return self.data[key]
+
+    @cached_property
+    def app_id(self) -> str:
+        return str(self.data["app_id"])
+
+    @cached_property
+    def app_secret(self) -> str:
+        return str(self.data["app_secret"])
+
+    @cached_property
+    def serial_number(self) -> str:
+        return str(self.data["serial_number"])
+
+    @cached_property
+    def price_multiplier(self) -> float:
+        return float(self.data["price_multiplier"])
+
+    @cached_property
+    def charge_to_full(self) -> int:
+        value = self.data["charge_to_full"]
+        # Reject fractional hours instead of silently truncating them
+        if float(value) != int(value):
+            raise ValueError(f"charge_to_full must be a whole number of hours, got {value}")
+        return int(value)
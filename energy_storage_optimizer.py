@@ -1,9 +1,16 @@
 import asyncio
+import atexit
 import datetime
 import logging
+import logging.handlers
 import os
+import queue
+from functools import cached_property, lru_cache
 from typing import List, Tuple
 
+import numpy as np
+import numpy.typing as npt
+
 from alpha_ess_manager import AlphaESSManager
 from config import Config
 from price_fetcher import PriceFetcher
@@ -14,22 +21,58 @@ DIR_NAME = os.path.dirname(__file__)
 MIDNIGHT = "00:00"
 CONFIG_PATH = os.path.join(DIR_NAME, "config.yaml")
 LOG_FILE = os.path.join(DIR_NAME, "ess.log")
+ONE_DAY = datetime.timedelta(days=1)
+# "HH:00" for every hour boundary of a day, index 24 included for windows ending at midnight
+HOUR_STRINGS = tuple(f"{hour:02d}:00" for hour in range(25))
+
+
+def setup_logging() -> None:
+    """Send log records through a queue to a background thread that writes the log file,
+    so logging calls never block on disk I/O. Safe to call more than once."""
+    root = logging.getLogger()
+    if any(isinstance(handler, logging.handlers.QueueHandler) for handler in root.handlers):
+        return
+
+    # delay=True opens the file on the first record instead of at import
+    file_handler = logging.FileHandler(LOG_FILE, delay=True)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+
+    log_queue = queue.SimpleQueue()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    # Flush queued records before the interpreter exits
+    atexit.register(listener.stop)
+
+
+@lru_cache(maxsize=None)
+def split_window_candidates(night_hours: int, hours_to_charge: int) -> Tuple[npt.NDArray[np.int16], ...]:
+    """All ways to split hours_to_charge into two separated windows within night_hours
+    Returns: (start1, end1, start2, end2) as parallel int16 arrays, one entry per candidate"""
+    window1_size, start1, start2 = np.indices((max(hours_to_charge - 1, 0), night_hours, night_hours))
+    window1_size += 1
+    end1 = start1 + window1_size
+    end2 = start2 + hours_to_charge - window1_size
+    # Windows must fit into the night and be separated by a gap, adjacent ones are a single window
+    valid = (end1 <= night_hours) & (start2 > end1) & (end2 <= night_hours)
+    candidates = tuple(bounds[valid].astype(np.int16) for bounds in (start1, end1, start2, end2))
+    for bounds in candidates:
+        # Shared between calls, so guard against accidental modification
+        bounds.flags.writeable = False
+    return candidates
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    filename=LOG_FILE,
-    format='%(asctime)s %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
 
 class EnergyStorageOptimizer:
     def __init__(self):
         self.config = Config(CONFIG_PATH)
-        self.price_fetcher = PriceFetcher()
-        self.manager = AlphaESSManager(self.config)
 
-    def find_optimal_charging_windows(self, prices: List[float], hours_to_charge: int) -> Tuple[List[Tuple[int, int]], float]:
+    # Created on first use so paths that never talk to the ESS don't set up its client
+    @cached_property
+    def manager(self) -> AlphaESSManager:
+        return AlphaESSManager(self.config)
+
+    def find_optimal_charging_windows(self, prices: npt.NDArray[np.float64], hours_to_charge: int) -> Tuple[List[Tuple[int, int]], float]:
         """Find the optimal charging window(s) during night hours (first 7 hours of the day)
         Returns: (windows, mean_price) where windows is a list of (start, end) tuples
         Example: ([(2,3), (6,8)], 25.5) means charge from 2-3 and 6-8 with average price of 25.5"""
@@ -37,60 +80,58 @@ class EnergyStorageOptimizer:
         if hours_to_charge > NIGHT_HOURS:
             raise ValueError(f"Charging duration ({hours_to_charge}h) cannot exceed night hours ({NIGHT_HOURS}h)")
 
+        # A view into the contiguous price array, no copy
         night_prices = prices[:NIGHT_HOURS]
-        min_mean = float('inf')
-        best_windows = []
+        if len(night_prices) < NIGHT_HOURS:
+            raise ValueError(f"Price data is incomplete: expected at least {NIGHT_HOURS} hourly prices, got {len(night_prices)}")
+        # Prefix sums turn every window sum into a single subtraction: sum(prices[a:b]) == csum[b] - csum[a]
+        csum = np.concatenate(([0.0], np.cumsum(night_prices)))
 
         # First, try a single continuous window of the required length
-        for start in range(NIGHT_HOURS - hours_to_charge + 1):
-            end = start + hours_to_charge
-            window = night_prices[start:end]
-            mean_price = sum(window) / hours_to_charge
-            if mean_price < min_mean:
-                min_mean = mean_price
-                best_windows = [(start, end)]
-
-        # If a single window does not provide the best mean price, try all possible combinations of two windows that sum to hours_to_charge
-        for window1_size in range(1, hours_to_charge):
-            window2_size = hours_to_charge - window1_size
-            
-            # Try all possible positions for first window
-            for start1 in range(NIGHT_HOURS - window1_size + 1):
-                end1 = start1 + window1_size
-                window1 = night_prices[start1:end1]
-                
-                # Try all possible positions for second window that don't overlap
-                for start2 in range(end1, NIGHT_HOURS - window2_size + 1):
-                    end2 = start2 + window2_size
-                    window2 = night_prices[start2:end2]
-                    
-                    # Calculate mean price for both windows combined
-                    total_price = sum(window1) + sum(window2)
-                    mean_price = total_price / hours_to_charge
-                    
-                    if mean_price < min_mean:
-                        min_mean = mean_price
-                        best_windows = [(start1, end1), (start2, end2)]
+        window_sums = csum[hours_to_charge:] - csum[:NIGHT_HOURS - hours_to_charge + 1]
+        start = int(window_sums.argmin())
+        min_mean = float(window_sums[start]) / hours_to_charge
+        best_windows = [(start, start + hours_to_charge)]
+
+        # No schedule can beat the mean of the hours_to_charge cheapest hours, so when the single window
+        # already reaches it there is nothing to gain from splitting
+        lower_bound = float(np.partition(night_prices, hours_to_charge - 1)[:hours_to_charge].sum()) / hours_to_charge
+
+        # If a single window does not provide the best mean price, evaluate all combinations of two windows
+        # that sum to hours_to_charge at once
+        if min_mean > lower_bound + 1e-9:
+            start1, end1, start2, end2 = split_window_candidates(NIGHT_HOURS, hours_to_charge)
+            if start1.size:
+                totals = csum[end1] - csum[start1] + csum[end2] - csum[start2]
+                best = int(totals.argmin())
+                mean_price = float(totals[best]) / hours_to_charge
+                if mean_price < min_mean:
+                    min_mean = mean_price
+                    best_windows = [(int(start1[best]), int(end1[best])), (int(start2[best]), int(end2[best]))]
 
         windows_str = ", ".join([f"{start},{end}" for start, end in best_windows])
-        logging.info(f"Found optimal charging window(s): {windows_str} with mean price: {min_mean:.1f} €/MWh")
+        logging.info("Found optimal charging window(s): %s with mean price: %.1f €/MWh", windows_str, min_mean)
         return best_windows, min_mean
 
-    def is_charging_profitable(self, mean_charge_price: float, daily_prices: List[float]) -> bool:
+    def is_charging_profitable(self, mean_charge_price: float, daily_prices: npt.NDArray[np.float64]) -> bool:
         """Determine if charging is profitable based on price multiplier and daily average"""
-        daily_average = sum(daily_prices) / len(daily_prices)
-        return mean_charge_price * self.config["price_multiplier"] <= daily_average
+        daily_average = float(daily_prices.mean())
+        return mean_charge_price * self.config.price_multiplier <= daily_average
 
     async def optimize_charging_schedule(self):
         """Main optimization logic to determine and set charging schedule"""
         # Fetch tomorrow's prices
-        tomorrow = datetime.date.today() + datetime.timedelta(days=0)
-        prices = await self.price_fetcher.fetch_prices_for_date(tomorrow)
+        tomorrow = datetime.date.today() + ONE_DAY
+        price_fetcher = PriceFetcher()
+        try:
+            prices = await price_fetcher.fetch_prices_for_date(tomorrow)
+        finally:
+            await price_fetcher.aclose()
 
         # Find optimal charging windows
         windows, mean_price = self.find_optimal_charging_windows(
             prices, 
-            self.config["charge_to_full"]
+            self.config.charge_to_full
         )
 
         # Determine if charging is worth it and set schedule
@@ -99,23 +140,21 @@ class EnergyStorageOptimizer:
             await self.manager.set_charging_schedule(False, MIDNIGHT, MIDNIGHT, MIDNIGHT, MIDNIGHT)
         else:
             # Convert first window to times
-            start_time1 = f"{windows[0][0]:02d}:00"
-            end_time1 = f"{windows[0][1]:02d}:00"
+            start_time1 = HOUR_STRINGS[windows[0][0]]
+            end_time1 = HOUR_STRINGS[windows[0][1]]
             
             # Convert second window to times (if it exists)
             start_time2 = MIDNIGHT
             end_time2 = MIDNIGHT
             if len(windows) > 1:
-                start_time2 = f"{windows[1][0]:02d}:00"
-                end_time2 = f"{windows[1][1]:02d}:00"
-                
-            logging.error(start_time1)
-            logging.error(end_time1)
-            
-            
+                start_time2 = HOUR_STRINGS[windows[1][0]]
+                end_time2 = HOUR_STRINGS[windows[1][1]]
+
+            logging.debug("Charging windows: %s-%s, %s-%s", start_time1, end_time1, start_time2, end_time2)
             await self.manager.set_charging_schedule(True, start_time1, end_time1, start_time2, end_time2)
 
 async def main():
+    setup_logging()
     optimizer = EnergyStorageOptimizer()
     await optimizer.optimize_charging_schedule()
 
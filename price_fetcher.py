@@ -1,36 +1,101 @@
+import asyncio
 import datetime
 import logging
+import os
 import backoff
 import httpx
-from typing import List, Dict
+import numpy as np
+import numpy.typing as npt
+import orjson
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 
 class PriceFetcher:
     PRICE_URL = 'https://www.ote-cr.cz/en/short-term-markets/electricity/day-ahead-market/@@chart-data?report_date='
+    MAX_CONCURRENT_REQUESTS = 8
+    CACHE_DIR = Path.home() / ".cache" / "ess"
 
     def __init__(self):
         self.timeout = httpx.Timeout(10.0, connect=60.0)
+        # Shared across dates and retries so the connection and TLS session are reused, created on the
+        # first request so fetches served from the disk cache don't set it up
+        self._client: Optional[httpx.AsyncClient] = None
+        # Bounds parallel fetches so OTE isn't hammered
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     @backoff.on_exception(backoff.expo,
                           (httpx.RequestError, httpx.HTTPStatusError, httpx.ReadTimeout),
                           max_time=120)
     async def get_request_with_backoff(self, url: str) -> httpx.Response:
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.get(url)
-            response.raise_for_status()
-            return response
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=httpx.Limits(max_keepalive_connections=10))
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response
 
-    async def fetch_prices_for_date(self, date: datetime.date) -> List[float]:
+    async def fetch_prices_for_date(self, date: datetime.date) -> npt.NDArray[np.float64]:
         url_date = date.strftime('%Y-%m-%d')
+        cache_path = self.CACHE_DIR / f"{url_date}.json"
+        # Published days never change, but today's data may still be refreshed by OTE
+        use_cache = date != datetime.date.today()
+        if use_cache:
+            content = await asyncio.to_thread(self._read_cache, cache_path)
+            if content is not None:
+                try:
+                    return self.get_prices_from_json(orjson.loads(content))
+                except (ValueError, KeyError, IndexError, TypeError):
+                    logging.warning("Ignoring corrupt price cache %s", cache_path)
+
         try:
-            response = await self.get_request_with_backoff(self.PRICE_URL + url_date)
-            return self.get_prices_from_json(response.json())
+            async with self._semaphore:
+                response = await self.get_request_with_backoff(self.PRICE_URL + url_date)
+            prices = self.get_prices_from_json(orjson.loads(response.content))
         except (httpx.RequestError, httpx.HTTPStatusError) as exc:
-            logging.error(f"Failed to fetch data from {exc.request.url!r} after retries")
+            logging.error("Failed to fetch data from %r after retries", exc.request.url)
             raise
         except Exception as e:
-            logging.error(f"An unexpected error occurred: {e}")
+            logging.error("An unexpected error occurred: %s", e)
             raise
 
+        # Don't cache an empty response for a day whose prices aren't published yet
+        if use_cache and prices.size:
+            await asyncio.to_thread(self._write_cache, cache_path, response.content)
+        return prices
+
+    @staticmethod
+    def _read_cache(path: Path) -> Optional[bytes]:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning("Failed to read price cache %s: %s", path, e)
+            return None
+
+    @staticmethod
+    def _write_cache(path: Path, content: bytes) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a concurrent reader never sees a partial file
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning("Failed to write price cache %s: %s", path, e)
+
+    async def fetch_prices_for_dates(self, dates: Iterable[datetime.date]) -> List[npt.NDArray[np.float64]]:
+        """Fetch prices for several dates concurrently, results are in the same order as dates"""
+        return await asyncio.gather(*(self.fetch_prices_for_date(date) for date in dates))
+
     @staticmethod
-    def get_prices_from_json(prices_json: Dict) -> List[float]:
-        return [float(point['y']) for point in prices_json['data']['dataLine'][1]['point']]
+    def get_prices_from_json(prices_json: Dict) -> npt.NDArray[np.float64]:
+        prices = np.fromiter((point['y'] for point in prices_json['data']['dataLine'][1]['point']), dtype=np.float64)
+        # np.fromiter turns a missing (null) price into NaN, which would silently poison the window search
+        if not np.isfinite(prices).all():
+            raise ValueError("Price data contains missing or non-finite values")
+        return prices